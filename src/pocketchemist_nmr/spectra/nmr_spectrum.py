@@ -64,14 +64,15 @@ class NMRSpectrum(abc.ABC):
     #: sinebell apodization and other methods
     unit_range_type = RangeType.UNIT
 
-    def __init__(self, in_filepath, out_filepath=None):
+    def __init__(self, in_filepath, out_filepath=None, **load_kwargs):
         self.reset()
         self.in_filepath = Path(in_filepath)
         self.out_filepath = (Path(out_filepath)
                              if out_filepath is not None else None)
 
-        # Load the spectrum
-        self.load()
+        # Load the spectrum. Additional keyword arguments are passed to the
+        # load method
+        self.load(**load_kwargs)
 
     # Basic accessor/mutator properties
 
@@ -305,9 +306,35 @@ class NMRSpectrum(abc.ABC):
         """
         raise NotImplementedError
 
-    def convert(self, value: float,
+    def configure_ranges(self, *,
+                         freq: t.Optional[RangeType] = None,
+                         time: t.Optional[RangeType] = None,
+                         unit: t.Optional[RangeType] = None):
+        """Set the range types used to generate ranges of values.
+
+        Parameters
+        ----------
+        freq
+            The range type for spectrum frequencies. If None, the current
+            freq_range_type is kept.
+        time
+            The range type for FID times. If None, the current
+            time_range_type is kept.
+        unit
+            The range type for unit ranges. If None, the current
+            unit_range_type is kept.
+        """
+        if freq is not None:
+            self.freq_range_type = freq
+        if time is not None:
+            self.time_range_type = time
+        if unit is not None:
+            self.unit_range_type = unit
+
+    def convert(self, value: t.Union[float, t.Sequence[float], torch.Tensor],
                 unit_from: UnitType = UnitType.POINTS,
-                unit_to: UnitType = UnitType.POINTS) -> t.Union[float, int]:
+                unit_to: UnitType = UnitType.POINTS
+                ) -> t.Union[float, int, torch.Tensor]:
         """Convert a values from one unit to another in the last (current)
         dimension.
 
@@ -316,7 +343,9 @@ class NMRSpectrum(abc.ABC):
         value
             The value to convert.
             If the unit_from is in points, negative values indicate the number
-            of points from the end of the dataset
+            of points from the end of the dataset.
+            Sequences and tensors of values are converted together, and the
+            converted values are returned as a tensor.
         unit_from
             The unit type of the value. eg. UnitType.Hz, UnitType.ppm.
             For UnitType.POINTS, reverse indexing is supported.
@@ -326,7 +355,8 @@ class NMRSpectrum(abc.ABC):
         Returns
         -------
         point
-            The point number corresponding to the value
+            The point number corresponding to the value, or a tensor of
+            converted values for a sequence or tensor of values
         """
         # Get parameters that will be needed in the calculations
         endpoints = dict()
@@ -346,6 +376,30 @@ class NMRSpectrum(abc.ABC):
             else:
                 raise NotImplementedError
 
+        if isinstance(value, (torch.Tensor, t.Sequence)):
+            # Convert sequences and tensors of values together
+            values = torch.as_tensor(value, dtype=torch.float64)
+
+            # Calculate the point positions from the endpoints, and allow
+            # reverse indexing for unit_from UnitType.POINTS
+            points = ((values - endpoints['from'][0]) * float(npts - 1) /
+                      (endpoints['from'][1] - endpoints['from'][0]))
+            if unit_from is UnitType.POINTS:
+                points = torch.where(values < 0, float(npts) + values, points)
+
+            # Check that the number of points is within range
+            assert bool(((points >= 0.0) & (points < float(npts))).all()), (
+                f"The values '{value}' are not within range of "
+                f"[{endpoints['from'][0]}, {endpoints['from'][1]}[")
+
+            # Convert the point positions to the new values
+            new_values = ((endpoints['to'][1] - endpoints['to'][0]) *
+                          (torch.round(points) / (npts - 1)) +
+                          endpoints['to'][0])
+
+            return (torch.round(new_values).long()
+                    if unit_to is UnitType.POINTS else new_values)
+
         # Get the point position for the 'from' value.
         if unit_from is UnitType.POINTS and value < 0:
             # Allow reverse indexing for unit_from UnitType.POINTS
@@ -692,15 +746,15 @@ class NMRSpectrum(abc.ABC):
         # Remove digitization, if needed
         if self.correct_digital_filter:
             shift_points = int(floor(self.group_delay))
-            self.data = torch.roll(self.data, (-shift_points))
+            self.data = torch.roll(self.data, -shift_points, dims=-1)
 
         # Perform the FFT then a frequency shift
         if center:
             # Apply fft_shift on the last dimension, which is the one being
             # Fourier transformed
-            self.data = fft_shift(fft_func(self.data), dim=-1)
+            self.data = fft_shift(fft_func(self.data, dim=-1), dim=-1)
         else:
-            self.data = fft_func(self.data)
+            self.data = fft_func(self.data, dim=-1)
 
         # Post process the data
         if inv and alt:
@@ -798,8 +852,10 @@ class NMRSpectrum(abc.ABC):
             else:
                 raise NotImplementedError
 
-        # Conduct the transpose
-        self.data = torch.transpose(self.data, dim0, dim1)
+        # Conduct the transpose. The transposed view is copied to a contiguous
+        # tensor in a single (blocked) copy by torch, so that the following
+        # operations on the last dimension access contiguous memory
+        self.data = torch.transpose(self.data, dim0, dim1).contiguous()
 
         # Determine if the new last dimension should be converted to complex
         if (update_data_layout and dim1 == self.ndims - 1 and
@@ -2,6 +2,7 @@
 Utilities to load NMRPipe data
 """
 import typing as t
+from contextlib import nullcontext
 from functools import reduce
 from itertools import zip_longest
 from math import isclose
@@ -137,7 +138,10 @@ def load_nmrpipe_tensor(filename: t.Union[str, Path],
     meta
         The NMRPipe metadata dict
     shared
-        Create the tensor storage to be shared between threads/processing
+        The tensor storage is memory-mapped from the file. If True (default),
+        the mapping is shared between threads/processing, and changes to the
+        tensor are written to the file. If False, the mapping is private
+        (copy-on-write), and changes to the tensor do not affect the file.
     device
         The name of the device to allocate the memory on.
     force_gpu
@@ -153,9 +157,10 @@ def load_nmrpipe_tensor(filename: t.Union[str, Path],
         raise FileNotFoundError(
             f"Could not find file for file path '{filename}'")
 
-    # Load the meta dict, if needed
+    # Load the meta dict, if needed. The header is read in a single unbuffered
+    # read, since the data is memory-mapped below
     if meta is None:
-        with open(filename, 'rb') as f:
+        with open(filename, 'rb', buffering=0) as f:
             meta = load_nmrpipe_meta(f)
 
     # Get the parsed values from the metadata dict
@@ -250,7 +255,10 @@ def load_nmrpipe_multifile_tensor(filemask: str,
     meta
         The NMRPipe metadata dict
     shared
-        Create the tensor storage to be shared between threads/processing
+        The tensor storage is memory-mapped from the file. If True (default),
+        the mapping is shared between threads/processing, and changes to the
+        tensor are written to the file. If False, the mapping is private
+        (copy-on-write), and changes to the tensor do not affect the file.
     device
         The name of the device to allocate the memory on.
     force_gpu
@@ -297,12 +305,26 @@ def load_nmrpipe_multifile_tensor(filemask: str,
     return meta_dicts, tensor
 
 
-def save_nmrpipe_tensor(filename: t.Union[str, Path],
+def save_nmrpipe_tensor(filename: t.Union[str, Path, t.BinaryIO],
                         meta: NMRPipeMetaDict,
                         tensor: torch.Tensor,
                         overwrite=True):
-    """Save a tensor in a single file in NMRPipe format."""
-    if Path(filename).exists() and not overwrite:
+    """Save a tensor in a single file in NMRPipe format.
+
+    Parameters
+    ----------
+    filename
+        The filepath or binary file object to save the tensor to. File objects
+        are written at their current position and are not closed.
+    meta
+        The NMRPipe metadata dict for the tensor
+    tensor
+        The tensor to save
+    overwrite
+        If True (default), overwrite existing files.
+    """
+    is_fileobj = hasattr(filename, 'write')
+    if not is_fileobj and Path(filename).exists() and not overwrite:
         raise FileExistsError
 
     # Unpack the real/imag components
@@ -315,13 +337,16 @@ def save_nmrpipe_tensor(filename: t.Union[str, Path],
     meta['FDMIN'] = torch.min(tensor)
     meta['FDDISPMIN'] = meta['FDMIN']
 
-    with open(filename, 'wb') as f:
+    with (nullcontext(filename) if is_fileobj else open(filename, 'wb')) as f:
         # Save the header
         data = save_nmrpipe_meta(meta=meta)
         f.write(data)
 
-        # Create a flattend view of the tensor
-        flatten = tensor.flatten()
+        # Create a flattened, contiguous tensor. This is a view for contiguous
+        # tensors, and strided tensors, like the real component of a complex
+        # tensor, are copied
+        flatten = tensor.reshape(-1).contiguous()
 
-        # Save the data in inner-outer1-outer2 order
-        flatten.numpy().tofile(f)
+        # Save the data in inner-outer1-outer2 order. The array's buffer is
+        # written directly, without copying it to bytes
+        f.write(flatten.numpy())
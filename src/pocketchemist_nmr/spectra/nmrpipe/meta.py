@@ -3,8 +3,11 @@ Functions and utilities to unpack NMRPipe headers
 """
 import struct
 from array import array
+from functools import lru_cache
 import typing as t
 
+import numpy as np
+
 from .definitions import get_nmrpipe_definitions
 from .constants import header_size_bytes, data_size_bytes
 from ..meta import NMRMetaDict
@@ -16,6 +19,69 @@ class NMRPipeMetaDict(NMRMetaDict):
     """A metadata dict containing entries in NMRPipe format"""
 
 
+@lru_cache(maxsize=None)
+def get_header_layout() -> t.Tuple[t.Dict[int, str],
+                                   t.Tuple[t.Tuple[str, int, int], ...]]:
+    """Return the layout of fields in the NMRPipe header.
+
+    The layout only depends on the header definitions, so it is computed
+    once and reused for every header that is loaded.
+
+    Returns
+    -------
+    fields_by_location, text_field_offsets
+        A dict of field names with the field locations (as multiples of
+        4 bytes) as keys, and a tuple of (field name, byte offset, byte size)
+        entries for the text fields.
+    """
+    field_locations, field_descriptions, text_fields = get_nmrpipe_definitions()
+    fields_by_location = {v: k for k, v in field_locations.items()}
+
+    text_field_offsets = []
+    for label, size in text_fields.items():
+        # Find the string location and size
+        key = 'FD' + label.replace('SIZE_', '')
+
+        if key not in field_locations:
+            continue
+
+        # Get the offset. This is the number of floats (4-bytes) before the
+        # text entry, so it needs to be multiplied by 4
+        offset = field_locations[key] * data_size_bytes
+        text_field_offsets.append((key, offset, size))
+
+    return fields_by_location, tuple(text_field_offsets)
+
+
+@lru_cache(maxsize=None)
+def get_header_dtype() -> np.dtype:
+    """Return a numpy structured dtype for the fields of the NMRPipe header.
+
+    Float fields are native 4-byte floats, and text fields are byte strings
+    with the size of the text field. Fields are ordered by their location in
+    the header.
+    """
+    fields_by_location, text_field_offsets = get_header_layout()
+    text_sizes = {key: size for key, offset, size in text_field_offsets}
+
+    names, formats, offsets = [], [], []
+    for location in sorted(fields_by_location):
+        name = fields_by_location[location]
+        offset = location * data_size_bytes
+        size = text_sizes.get(name, data_size_bytes)
+
+        # Only include fields that fit in the header
+        if offset + size > header_size_bytes:
+            continue
+
+        names.append(name)
+        formats.append(f'S{size}' if name in text_sizes else 'f4')
+        offsets.append(offset)
+
+    return np.dtype({'names': names, 'formats': formats, 'offsets': offsets,
+                     'itemsize': header_size_bytes})
+
+
 def load_nmrpipe_meta(filelike: t.BinaryIO, start: int = 0,
                       end: t.Optional[int] = header_size_bytes) \
         -> NMRPipeMetaDict:
@@ -38,9 +104,9 @@ def load_nmrpipe_meta(filelike: t.BinaryIO, start: int = 0,
         an NMRPipe spectrum.
     """
 
-    # Get the header definitions
-    field_locations, field_descriptions, text_fields = get_nmrpipe_definitions()
-    fields_by_location = {v: k for k, v in field_locations.items()}
+    # Get the header layout
+    _, text_field_offsets = get_header_layout()
+    header_dtype = get_header_dtype()
 
     # Get the current offset for the buffer and start the buffer, if specified
     cur_pos = filelike.tell()
@@ -56,32 +122,23 @@ def load_nmrpipe_meta(filelike: t.BinaryIO, start: int = 0,
     else:
         filelike.seek(cur_pos)
 
-    # Parse the buffer float values
-    hdr_it = struct.iter_unpack('f', buff)
-    pipedict = {fields_by_location[i]: v for i, (v,) in enumerate(hdr_it)
-                if i in fields_by_location}
+    # Parse all of the buffer fields from a single record view
+    record = np.frombuffer(buff, dtype=header_dtype, count=1)[0]
+    pipedict = dict(zip(header_dtype.names, record.item()))
 
     # Parse the strings
-    for label, size in text_fields.items():
-        # Find the string location and size
-        key = 'FD' + label.replace('SIZE_', '')
-
-        if key not in field_locations:
+    for key, offset, size in text_field_offsets:
+        string = pipedict.get(key)
+        if not isinstance(string, bytes):
             continue
 
-        # Get the offset. This is the number of floats (4-bytes) before the
-        # text entry, so it needs to be multiplied by 4
-        offset = field_locations[key] * data_size_bytes
-
         # Try to convert to string
         try:
-            # Locate and unpack the string
-            string = struct.unpack_from(f'{size}s', buff, offset=offset)[0]
-
             # Convert the string to unicode and remove empty bytes
             pipedict[key] = string.decode().strip('\x00')
-        except (UnicodeDecodeError, struct.error):
-            pass
+        except UnicodeDecodeError:
+            # Use the float value at the text field's location instead
+            pipedict[key] = struct.unpack_from('f', buff, offset=offset)[0]
 
     # Convert to and return a NMRPipeMetaDict
     return NMRPipeMetaDict(pipedict)
@@ -239,7 +239,11 @@ class NMRPipeSpectrum(NMRSpectrum):
         in_filepath
             The filepath for the spectrum file(s) to load.
         shared
-            Create the tensor storage to be shared between threads/processing
+            The tensor storage is memory-mapped from the file. If True
+            (default), the mapping is shared between threads/processing, and
+            changes to the data are written to the file. If False, the mapping
+            is private (copy-on-write), and changes to the data do not affect
+            the file.
         device
             The name of the device to allocate the memory on.
         force_gpu
@@ -265,7 +269,7 @@ class NMRPipeSpectrum(NMRSpectrum):
             self.meta, self.data = meta, data
 
     def save(self,
-             out_filepath: t.Optional[t.Union[str, Path]] = None,
+             out_filepath: t.Optional[t.Union[str, Path, t.BinaryIO]] = None,
              format: str = None,
              overwrite: bool = True):
         """Save the spectrum to the specified filepath
@@ -273,7 +277,8 @@ class NMRPipeSpectrum(NMRSpectrum):
         Parameters
         ----------
         out_filepath
-            The filepath for the file(s) to save the spectrum.
+            The filepath for the file(s) to save the spectrum, or a binary
+            file object to write the spectrum to.
         format
             The format of the spectrum to write. By default, this is nmrpipe.
         overwrite
@@ -33,6 +33,7 @@ from .constants import RangeType
 
 __all__ = ('interleave_block_to_single', 'interleave_single_to_block',
            'split_block_to_complex', 'split_single_to_complex',
+           'split_single_to_soa',
            'combine_block_from_complex', 'combine_single_from_complex',
            'range_endpoints', 'gen_range')
 
@@ -51,10 +52,11 @@ def interleave_block_to_single(tensor: torch.Tensor) -> torch.Tensor:
     tensor
         A real tensor with single-interleaved data in the last dimension
     """
-    # Single Interleave the blocks
-    return torch.stack(tensor.split(int(tensor.size()[-1] / 2),
-                                    dim=tensor.dim() - 1),
-                       dim=tensor.dim()).view(tensor.size())
+    # Swap the (real/imag, point) axes of the last dimension. The transpose is
+    # a view, and the last reshape makes a single contiguous copy
+    npts = tensor.size()[-1] // 2
+    return (tensor.reshape(*tensor.size()[:-1], 2, npts)
+            .transpose(-1, -2).reshape(tensor.size()))
 
 
 def interleave_single_to_block(tensor: torch.Tensor) -> torch.Tensor:
@@ -71,8 +73,11 @@ def interleave_single_to_block(tensor: torch.Tensor) -> torch.Tensor:
     tensor
         A real tensor with block-interleaved data in the last dimension
     """
-    # Separate single interleave and interleave the blocks
-    return torch.hstack((tensor[..., ::2], tensor[..., 1::2]))
+    # Swap the (point, real/imag) axes of the last dimension. The transpose is
+    # a view, and the last reshape makes a single contiguous copy
+    npts = tensor.size()[-1] // 2
+    return (tensor.reshape(*tensor.size()[:-1], npts, 2)
+            .transpose(-1, -2).reshape(tensor.size()))
 
 
 def split_block_to_complex(tensor: torch.Tensor) -> torch.Tensor:
@@ -119,8 +124,12 @@ def split_block_to_complex(tensor: torch.Tensor) -> torch.Tensor:
     >>> cmplx.size()
     torch.Size([4, 1, 2])
     """
-    return torch.complex(*torch.split(tensor, int(tensor.size()[-1] / 2),
-                                      dim=tensor.dim() - 1))
+    # Move the real/imag blocks to a trailing axis of size 2. This copies the
+    # data once, and the complex tensor is a view of the copy
+    npts = tensor.size()[-1] // 2
+    pairs = (tensor.reshape(*tensor.size()[:-1], 2, npts)
+             .transpose(-1, -2).contiguous())
+    return torch.view_as_complex(pairs)
 
 
 def split_single_to_complex(tensor: torch.Tensor) -> torch.Tensor:
@@ -136,10 +145,43 @@ def split_single_to_complex(tensor: torch.Tensor) -> torch.Tensor:
     -------
     complex_tensor
         A complex tensor constructed from deinterleaved data in the last
-        dimension.
+        dimension. When the real/imag pairs are aligned in memory, as for
+        contiguous tensors, this is a view of the tensor's data, and in-place
+        changes to one are seen by the other.
+    """
+    # The real/imag pairs are adjacent, so the pairs can be viewed as complex
+    # numbers without copying the data. This needs the pairs to be aligned to
+    # complex numbers, otherwise the pairs are copied first
+    npts = tensor.size()[-1] // 2
+    pairs = tensor.reshape(*tensor.size()[:-1], npts, 2)
+    if (pairs.stride()[-1] != 1 or pairs.storage_offset() % 2 or
+            any(stride % 2 for stride in pairs.stride()[:-1])):
+        pairs = pairs.clone(memory_format=torch.contiguous_format)
+    return torch.view_as_complex(pairs)
+
+
+def split_single_to_soa(tensor: torch.Tensor) \
+        -> t.Tuple[torch.Tensor, torch.Tensor]:
+    """Split a tensor with single interleaved real/imag data in the last
+    dimension into separate real and imag tensors.
+
+    Element-wise operations on the real and imag components vectorize better
+    with separate (structure of arrays) tensors than with the interleaved
+    real/imag pairs of a complex tensor.
+
+    Parameters
+    ----------
+    tensor
+        Tensor with real single-interleaved data in the last dimension
+
+    Returns
+    -------
+    real, imag
+        The real and imag components of the last dimension. These are strided
+        views of the tensor's data, so in-place changes to them modify the
+        tensor.
     """
-    # Separate the interleaved data into real and complex components
-    return torch.complex(real=tensor[..., ::2], imag=tensor[..., 1::2])
+    return tensor[..., ::2], tensor[..., 1::2]
 
 
 def combine_block_from_complex(complex_tensor: torch.Tensor) -> torch.Tensor:
@@ -163,10 +205,13 @@ def combine_block_from_complex(complex_tensor: torch.Tensor) -> torch.Tensor:
     >>> t1.size()
     torch.Size([4, 2, 2])
     >>> t2 = combine_from_complex(split_to_complex(t1))
-    >>> torch.all(torch.eq(t1, t2))  # The tensors are the same
-    tensor(True)
+    >>> torch.equal(t1, t2)  # The tensors are the same
+    True
     """
-    return torch.hstack((complex_tensor.real, complex_tensor.imag))
+    # View the complex numbers as trailing real/imag pairs, and move the pairs
+    # into real and imag blocks with a single copy
+    size = (*complex_tensor.size()[:-1], complex_tensor.size()[-1] * 2)
+    return torch.view_as_real(complex_tensor).transpose(-1, -2).reshape(size)
 
 
 def combine_single_from_complex(complex_tensor: torch.Tensor) -> torch.Tensor:
@@ -181,16 +226,13 @@ def combine_single_from_complex(complex_tensor: torch.Tensor) -> torch.Tensor:
     Returns
     -------
     tensor
-        A real tensor with the real/imag components block-interleaved data in
-        the last dimension.
+        A real tensor with the real/imag components single-interleaved data in
+        the last dimension. For contiguous tensors, this is a view of the
+        complex tensor's data.
     """
-    # Single Interleave the blocks
-    dim = complex_tensor.dim()
-    # Increase the last dimension's size by a factor of 2
-    size = tuple(s if i < dim - 1 else int(s * 2.)
-                 for i, s in enumerate(complex_tensor.size()))
-    return torch.stack((complex_tensor.real, complex_tensor.imag),
-                       dim=dim).view(size)
+    # The real/imag view of the complex numbers is already single interleaved
+    size = (*complex_tensor.size()[:-1], complex_tensor.size()[-1] * 2)
+    return torch.view_as_real(complex_tensor).reshape(size)
 
 
 def range_endpoints(npts: int,
@@ -7,9 +7,9 @@ from pocketchemist_nmr.spectra import NMRPipeSpectrum
 
 
 @parametrize_with_cases('expected', glob='*nmrpipe*', prefix='data_',
-                        cases='..cases')
-def test_load_spectra_nmrpipe(expected):
-    """Test the LoadSpectra processor"""
+                        cases='..cases.nmrpipe')
+def test_load_save_spectra_nmrpipe(expected, tmpdir):
+    """Test the LoadSpectra and SaveSpectra processors"""
     # Run the processor
     processor = LoadSpectra(in_filepaths=expected['filepath'],
                             format='nmrpipe')
@@ -20,24 +20,9 @@ def test_load_spectra_nmrpipe(expected):
     assert len(kwargs['spectra']) == 1
 
     # Check the spectrum's class and metadata
-    spectrum = kwargs['spectra'][0]
-    assert isinstance(spectrum, NMRPipeSpectrum)
-    assert spectrum.ndims == expected['header']['ndims']
-
-
-@parametrize_with_cases('expected', glob='*nmrpipe*', prefix='data_',
-                        cases='..cases.nmrpipe')
-def test_load_spectra_nmrpipe(expected, tmpdir):
-    """Test the LoadSpectra processor"""
-    # Run the processor
-    processor = LoadSpectra(in_filepaths=expected['filepath'],
-                            format='nmrpipe')
-    kwargs = processor.process()
-
-    # Check that the spectrum was correctly loaded and returned in the kwargs
-    assert 'spectra' in kwargs
-    assert len(kwargs['spectra']) == 1
     spectrum_load = kwargs['spectra'][0]
+    assert isinstance(spectrum_load, NMRPipeSpectrum)
+    assert spectrum_load.ndims == expected['header']['ndims']
 
     # Save spectra and try reloading
     out_filepath = Path(tmpdir) / expected['filepath'].name.replace("%", "")
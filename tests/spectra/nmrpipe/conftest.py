@@ -0,0 +1,109 @@
+"""
+Fixtures for the NMRPipe spectrum tests
+"""
+import typing as t
+from copy import deepcopy
+from pathlib import Path
+
+import pytest
+from pocketchemist_nmr.spectra.nmrpipe import NMRPipeSpectrum
+
+#: The range type attributes that tests may set on shared spectra
+range_type_attrs = ('freq_range_type', 'time_range_type', 'unit_range_type')
+
+
+def get_cached_spectrum(spectrum_cache: dict, filepath) -> NMRPipeSpectrum:
+    """Retrieve a spectrum from the cache, and load it if it isn't cached.
+
+    The spectra are loaded with private (copy-on-write) memory maps, so that
+    tests cannot modify the data files.
+    """
+    spectrum = spectrum_cache.get(filepath)
+    if spectrum is None:
+        spectrum = NMRPipeSpectrum(filepath, shared=False)
+        spectrum_cache[filepath] = spectrum
+    return spectrum
+
+
+@pytest.fixture(scope='session')
+def spectrum_cache():
+    """The NMRPipe spectra loaded in the test session, keyed by filepath"""
+    cache = dict()
+    yield cache
+    cache.clear()
+
+
+@pytest.fixture
+def load_spectrum(spectrum_cache):
+    """Load NMRPipe spectra, reading each file only once per test session.
+
+    The returned spectra are copies, so that processing methods do not modify
+    the cached spectra. Read-only tests and the reference spectra of processing
+    tests can use the cached spectra directly with ``copy=False``, which avoids
+    copying their data, and the range types set on these are reset after the
+    test.
+    """
+    shared = []
+
+    def load(filepath, copy=True) -> NMRPipeSpectrum:
+        spectrum = get_cached_spectrum(spectrum_cache, filepath)
+
+        if copy:
+            return deepcopy(spectrum)
+
+        shared.append(spectrum)
+        return spectrum
+
+    yield load
+
+    # Restore the default range types of the shared spectra
+    for spectrum in shared:
+        for attr in range_type_attrs:
+            spectrum.__dict__.pop(attr, None)
+
+
+@pytest.fixture
+def load_spectra(load_spectrum):
+    """Load the spectrum and reference spectrum of a processing test.
+
+    The spectrum to process is a copy, and the reference spectrum, which is
+    only read, is the cached spectrum.
+    """
+    def load(expected, expected_reference) -> t.Tuple[NMRPipeSpectrum,
+                                                      NMRPipeSpectrum]:
+        return (load_spectrum(expected['filepath']),
+                load_spectrum(expected_reference['filepath'], copy=False))
+
+    return load
+
+
+@pytest.fixture
+def spectrum(expected, load_spectrum):
+    """The cached NMRPipe spectrum of an expected test case, for read-only
+    tests"""
+    return load_spectrum(expected['filepath'], copy=False)
+
+
+@pytest.fixture(scope='session')
+def save_spectrum(tmp_path_factory, spectrum_cache):
+    """Save NMRPipe spectra to a session temporary directory.
+
+    Each spectrum is only saved once per test session (and per xdist worker,
+    which has its own temporary directory), and the saved filepath is
+    returned.
+    """
+    saved = dict()
+
+    def save(filepath) -> Path:
+        out_filepath = saved.get(filepath)
+        if out_filepath is None:
+            # Saving updates the meta dict, so save a copy of the spectrum
+            spectrum = deepcopy(get_cached_spectrum(spectrum_cache, filepath))
+
+            out_dir = tmp_path_factory.mktemp(Path(filepath).stem)
+            out_filepath = out_dir / Path(filepath).name
+            spectrum.save(out_filepath=out_filepath, overwrite=False)
+            saved[filepath] = out_filepath
+        return out_filepath
+
+    return save
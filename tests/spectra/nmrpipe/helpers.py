@@ -0,0 +1,24 @@
+"""
+Helper functions to compare values in the NMRPipe tests
+"""
+import numpy as np
+
+
+def isclose_array(values1: np.ndarray, values2: np.ndarray,
+                  rel_tol=1e-09, abs_tol=0.0) -> np.ndarray:
+    """Element-wise :func:`math.isclose` for arrays of floats (or
+    :func:`cmath.isclose` for arrays of complex numbers)"""
+    diff = np.abs(values1 - values2)
+    return ((values1 == values2) |
+            (diff <= rel_tol * np.maximum(np.abs(values1), np.abs(values2))) |
+            (diff <= abs_tol))
+
+
+def allclose(values1, values2, rel_tol=1e-09, abs_tol=0.0) -> bool:
+    """Check that two (nested) sequences of floats have the same shape and
+    match with the tolerances of :func:`math.isclose`"""
+    values1 = np.asarray(values1, dtype=float)
+    values2 = np.asarray(values2, dtype=float)
+    if values1.shape != values2.shape:
+        return False
+    return bool(np.all(isclose_array(values1, values2, rel_tol, abs_tol)))
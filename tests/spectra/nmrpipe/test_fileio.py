@@ -1,15 +1,35 @@
 """
 Test the NMRPipe fileio functions
 """
-from cmath import isclose
 from pathlib import Path
+from shutil import copyfile
 
+import numpy as np
+import torch
 from pytest_cases import parametrize_with_cases
 from pocketchemist_nmr.spectra.nmrpipe.fileio import (
     parse_nmrpipe_meta, load_nmrpipe_tensor, load_nmrpipe_multifile_tensor,
     save_nmrpipe_tensor)
 from pocketchemist_nmr.spectra.nmrpipe.meta import load_nmrpipe_meta
 
+from .helpers import isclose_array
+
+
+def match_data_heights(tensor, data_heights, rel_tol=0.001):
+    """Check the data values of a tensor at key points (locations) with the
+    tolerance of :func:`cmath.isclose`"""
+    locs, heights = zip(*data_heights)
+
+    # Retrieve the data values at all locations at once
+    index = tuple(torch.tensor(i) for i in zip(*locs))
+    values = tensor[index].cpu().numpy()
+    heights = np.asarray(heights)
+
+    close = isclose_array(values, heights, rel_tol=rel_tol)
+    assert close.all(), [(loc, value, height)
+                         for loc, value, height, c
+                         in zip(locs, values, heights, close) if not c]
+
 
 @parametrize_with_cases('expected', glob='*nmrpipe*', prefix='data_',
                         cases='...cases.nmrpipe')
@@ -45,13 +65,13 @@ def test_load_nmrpipe_tensor(expected, benchmark):
     benchmark.extra_info['filepath'] = expected['filepath']
     meta, tensor = benchmark(load_nmrpipe_tensor, expected['filepath'])
 
-    # Check the loaded tensor
+    # Check the loaded tensor. The single-precision data on disk is not
+    # upcast to double precision
     assert tensor.shape == expected['spectrum']['shape']
+    assert tensor.dtype in (torch.float32, torch.complex64)
 
     # Check the data values for some key points (locations) in the data
-    for loc, data_height in expected['spectrum']['data_heights']:
-        print(loc, data_height)
-        assert isclose(tensor[loc], data_height, rel_tol=0.001)
+    match_data_heights(tensor, expected['spectrum']['data_heights'])
 
 
 @parametrize_with_cases('expected', glob='*nmrpipe*', prefix='data_',
@@ -64,18 +84,38 @@ def test_load_nmrpipe_multifile_tensor(expected, benchmark):
     meta_dict, tensor = benchmark(load_nmrpipe_multifile_tensor,
                                   expected['filepath'])
 
-    # Show information on the tensor's memory size
+    # Record information on the tensor's memory size
     tensor_size_bytes = (tensor.storage().size() *
                          tensor.storage().element_size())
-    print(f"Tensor size: {tensor_size_bytes / (1024 * 1024)} MB")
+    benchmark.extra_info['tensor_size_mb'] = tensor_size_bytes / (1024 * 1024)
 
-    # Check the loaded tensor
+    # Check the loaded tensor. The single-precision data on disk is not
+    # upcast to double precision
     assert tensor.shape == expected['spectrum']['shape']
+    assert tensor.dtype in (torch.float32, torch.complex64)
 
     # Check the data values for some key points (locations) in the data
-    for loc, data_height in expected['spectrum']['data_heights']:
-        print(loc, data_height)
-        assert isclose(tensor[loc], data_height, rel_tol=0.001)
+    match_data_heights(tensor, expected['spectrum']['data_heights'])
+
+
+@parametrize_with_cases('expected', glob='*nmrpipe_real_spectrum_1d',
+                        prefix='data_', cases='...cases.nmrpipe')
+def test_load_nmrpipe_tensor_private(expected, tmp_path):
+    """Test that changes to tensors loaded with private memory maps do not
+    modify the file."""
+    # Load the tensor from a copy of the file
+    filepath = tmp_path / expected['filepath'].name
+    copyfile(expected['filepath'], filepath)
+    file_bytes = filepath.read_bytes()
+    meta, tensor = load_nmrpipe_tensor(filepath, shared=False)
+
+    # Modify the tensor in place. The file should be unchanged
+    tensor.fill_(0.0)
+    assert filepath.read_bytes() == file_bytes
+
+    # Reloading the tensor gives the original data
+    meta, tensor = load_nmrpipe_tensor(filepath, shared=False)
+    match_data_heights(tensor, expected['spectrum']['data_heights'])
 
 
 @parametrize_with_cases('expected', glob='*nmrpipe*', prefix='data_',
@@ -95,9 +135,7 @@ def test_save_nmrpipe_tensor(expected, tmpdir, benchmark):
     meta, tensor = benchmark(load_nmrpipe_tensor, tmpfilename)
 
     # Check the data values for some key points (locations) in the data
-    for loc, data_height in expected['spectrum']['data_heights']:
-        print(loc, data_height)
-        assert isclose(tensor[loc], data_height, rel_tol=0.001)
+    match_data_heights(tensor, expected['spectrum']['data_heights'])
 
     # Delete the file
     tmpfilename.unlink()
@@ -1,41 +1,75 @@
 """
 Test the spectra/nmrpipe_spectrum.py submodule
 """
-from cmath import isclose
-from math import floor
+from math import isclose, floor
+from io import BytesIO
+from functools import lru_cache
 from pathlib import Path
 from itertools import product, chain
+import operator
 import typing as t
 
+import numpy as np
 import torch
+from torch.testing import assert_close
 import pytest
 from pytest_cases import parametrize_with_cases, get_all_cases
-from pocketchemist_nmr.spectra.nmrpipe import NMRPipeSpectrum
+from pocketchemist_nmr.spectra.nmrpipe.meta import load_nmrpipe_meta
+from pocketchemist_nmr.spectra.nmrpipe.fileio import load_nmrpipe_tensor
+from pocketchemist_nmr.spectra.nmrpipe.constants import header_size_bytes
 from pocketchemist_nmr.spectra.constants import (UnitType, ApodizationType,
                                                  DomainType, RangeType)
 
+from .helpers import isclose_array, allclose
+
 #: Attributes to test
 attrs = ('ndims', 'order', 'domain_type', 'data_type', 'sw_hz', 'sw_ppm',
          'car_hz', 'car_ppm', 'range_hz', 'range_ppm', 'range_s', 'obs_mhz',
          'label', 'apodization', 'group_delay', 'correct_digital_filter',
          'sign_adjustment', 'plane2dphase')
 
+#: Retrieve the values of the attributes to test from a spectrum
+get_attrs = operator.attrgetter(*attrs)
+
+
+@lru_cache(maxsize=None)
+def get_case_funcs(glob, cases=None, prefix='data_') -> tuple:
+    """Return the case functions matching a glob. The case functions are
+    only looked up once for each glob."""
+    dummy = lambda: None
+    return tuple(get_all_cases(dummy, cases=cases, prefix=prefix, glob=glob))
+
+
+@lru_cache(maxsize=None)
+def get_case_data(func) -> dict:
+    """Return the data for a case function. Case functions only return
+    expected values, so each is only evaluated once."""
+    return func()
+
+
+def get_case_id(funcs, prefix='data_') -> str:
+    """Return a readable test id for a combination of case functions"""
+    return '-'.join(f.__name__[len(prefix):] if f.__name__.startswith(prefix)
+                    else f.__name__ for f in funcs)
+
 
 def parametrize_casesets(*globs, cases=None, prefix='data_') -> tuple:
     """Convert a series of case globs into a set of cases for parametrization.
+
+    The cases are identified by the names of their case functions, so that
+    the test ids are readable and stable between test sessions and workers.
     """
     # Convert globs to functions
     funcs = []
-    dummy = lambda: None
     for glob in globs:
-        glob_funcs = map(lambda glob: get_all_cases(dummy, cases=cases,
-                                                    prefix=prefix, glob=glob),
-                         glob if not isinstance(glob, str) else (glob,))
-        glob_funcs = chain.from_iterable(glob_funcs)
+        glob_funcs = chain.from_iterable(
+            get_case_funcs(g, cases=cases, prefix=prefix)
+            for g in (glob if not isinstance(glob, str) else (glob,)))
         funcs.append(glob_funcs)
 
-    # Create a generator for the product of these
-    return tuple(tuple(f() for f in prod) if len(prod) > 1 else prod[0]()
+    # Create the parameter sets for the product of these
+    return tuple(pytest.param(*(get_case_data(f) for f in prod),
+                              id=get_case_id(prod, prefix=prefix))
                  for prod in product(*funcs))
 
 
@@ -43,28 +77,20 @@ def match_attributes(spectrum, expected):
     """Check the attributes of a spectrum"""
     unmatched_values = dict()
 
-    for attr in attrs:
-        spectrum_value = getattr(spectrum, attr)
+    for attr, spectrum_value in zip(attrs, get_attrs(spectrum)):
         expected_value = expected['spectrum'][attr]
 
+        # Convert sequences of expected values to an array once, to both find
+        # their type and compare them
+        expected_array = (np.asarray(expected_value)
+                          if hasattr(expected_value, '__iter__') else None)
+
         # Check that the values match expected
-        if (hasattr(expected_value, '__iter__') and
-                all(isinstance(i, float) for i in expected_value)):
-            # Float parameters
-            if not all(isclose(i, j)
-                       for i, j in zip(spectrum_value, expected_value)):
+        if expected_array is not None and expected_array.dtype.kind == 'f':
+            # Float parameters and tuples of tuples of floats
+            if not allclose(spectrum_value, expected_array):
                 unmatched_values[attr] = ('mismatched float values',
                                           spectrum_value, expected_value)
-        elif (hasattr(expected_value, '__iter__') and
-              all(isinstance(i, tuple) for i in expected_value) and
-              all(isinstance(j, float) for i in expected_value for j in i )):
-            # Tuple of tuples of floats
-            if not all(isclose(i, j)
-                       for tpl1, tpl2 in zip(spectrum_value, expected_value)
-                       for i, j in zip(tpl1, tpl2)):
-                unmatched_values[attr] = ('mistmatched tuple of tuple floats',
-                                          spectrum_value, expected_value)
-
         else:
             # All other values are compared directly
             if not spectrum_value == expected_value:
@@ -80,6 +106,33 @@ def match_attributes(spectrum, expected):
         raise AssertionError(msg)
 
 
+def match_minmax_values(value1, value2) -> bool:
+    """Match FDMAX/FDMIN/FDDISPMAX/FDDISPMIN values within error (or within
+    0.01%)"""
+    return isclose(value1, value2, rel_tol=0.0001)
+
+
+def match_float_arrays(keys, values1: np.ndarray,
+                       values2: np.ndarray) -> np.ndarray:
+    """Match arrays of float meta values in a single vectorized pass.
+
+    Min/max values are matched like :func:`match_minmax_values`, and other
+    float values are matched when rounded to the first 2 decimals.
+    """
+    is_minmax = np.fromiter(('MIN' in k or 'MAX' in k for k in keys),
+                            dtype=bool, count=len(keys))
+    return np.where(is_minmax,
+                    isclose_array(values1, values2, rel_tol=0.0001),
+                    np.round(values1, 2) == np.round(values2, 2))
+
+
+#: The function and mismatch reason used to match non-float meta values
+default_meta_matcher = (operator.eq, 'mismatched values')
+
+#: The function and mismatch reason used to match min/max meta values
+minmax_meta_matcher = (match_minmax_values, 'mismatched min/max values')
+
+
 def match_metas(meta1: dict, meta2: dict,
                 skip: t.Optional[t.Tuple[str, ...]] = None):
     """Check that 2 meta dicts match
@@ -94,41 +147,56 @@ def match_metas(meta1: dict, meta2: dict,
         An optional list of keys to skip over when doing the comparison match
     """
     # Find keys missing from between the two meta dicts
-    assert len(meta1.keys() - meta2.keys()) == 0, (
+    assert meta1.keys() == meta2.keys(), (
         f"The following keys are in meta1 but not meta2: "
-        f"{meta1.keys() - meta2.keys()}")
-    assert len(meta2.keys() - meta1.keys()) == 0, (
-        f"The following keys are in meta2 but not meta1: "
+        f"{meta1.keys() - meta2.keys()}; "
+        f"the following keys are in meta2 but not meta1: "
         f"{meta2.keys() - meta1.keys()}")
 
-    # Check the values
+    # Skip the entry-by-entry check if the (non-skipped) values and their
+    # types are identical
+    values1 = {k: v for k, v in meta1.items() if skip is None or k not in skip}
+    values2 = {k: meta2[k] for k in values1}
+    if (values1 == values2 and
+            list(map(type, values1.values())) ==
+            list(map(type, values2.values()))):
+        return
+
+    # Check the float values together in a single vectorized pass
     unmatched_values = dict()
-    for k in meta1.keys():
-        # Skip entry, if specified
-        if skip is not None and k in skip:
+    float_keys = tuple(k for k, v in values1.items()
+                       if type(v) is float and type(values2[k]) is float)
+    floats1 = np.fromiter((values1[k] for k in float_keys), dtype=float,
+                          count=len(float_keys))
+    floats2 = np.fromiter((values2[k] for k in float_keys), dtype=float,
+                          count=len(float_keys))
+    matched = match_float_arrays(float_keys, floats1, floats2)
+    for i in np.flatnonzero(~matched):
+        k = float_keys[i]
+        reason = ('mismatched min/max values' if 'MIN' in k or 'MAX' in k
+                  else 'mismatched float values')
+        unmatched_values[k] = (reason, values1[k], values2[k])
+
+    # Check the other values
+    checked_keys = set(float_keys)
+    for k, value1 in values1.items():
+        if k in checked_keys:
             continue
 
-        value1, value2 = meta1[k], meta2[k]
+        value2 = values2[k]
 
         # Check that the types match
         if type(value1) != type(value2):
             unmatched_values[k] = ('mismatched types', value1, value2)
 
+        # Find the matching function for the value
         if 'MIN' in k or 'MAX' in k:
-            if not isclose(value1, value2, rel_tol=0.0001):
-                # For FDMAX/FDMIN/FDDISPMAX/FDDISPMIN, these should be within
-                # error (or within 0.01%)
-                unmatched_values[k] = ('mismatched min/max values', value1,
-                                       value2)
-        elif isinstance(value1, float):
-            if round(value1, 2) != round(value2, 2):
-                # For other floats, round them to make sure they match within
-                # the first decimal
-                unmatched_values[k] = ('mismatched float values',
-                                       value1, value2)
-        elif value1 != value2:
-            # For other values, just check them directly
-            unmatched_values[k] = ('mismatched values', value1, value2)
+            matcher, reason = minmax_meta_matcher
+        else:
+            matcher, reason = default_meta_matcher
+
+        if not matcher(value1, value2):
+            unmatched_values[k] = (reason, value1, value2)
 
     # Assert that there are no unmatched_values
     if len(unmatched_values) > 0:
@@ -141,10 +209,14 @@ def match_metas(meta1: dict, meta2: dict,
 
 def match_tuple_floats(t1, t2, **kwargs):
     """Match the values of two tuples with floats"""
-    mismatched = dict()
-    for item, (value1, value2) in enumerate(zip(t1, t2)):
-        if not isclose(value1, value2, **kwargs):
-            mismatched[item] = value1, value2
+    values1 = np.asarray(t1, dtype=float)
+    values2 = np.asarray(t2, dtype=float)
+    assert values1.shape == values2.shape, (
+        f"Mismatch between the lengths of tuples of floats {t1} and {t2}")
+
+    mismatched = {item: (t1[item], t2[item])
+                  for item in np.flatnonzero(~isclose_array(values1, values2,
+                                                            **kwargs))}
 
     if len(mismatched) > 0:
         msg = f"Mismatch between tuple of floats {t1} and {t2}:\n"
@@ -154,19 +226,46 @@ def match_tuple_floats(t1, t2, **kwargs):
         raise AssertionError(msg)
 
 
+def range_points(ranges, index) -> torch.Tensor:
+    """Stack the values at the given index for a tuple of range tensors"""
+    return torch.stack([rng[index] for rng in ranges])
+
+
+def relative_error(tensor, reference) -> float:
+    """The L2 norm of the difference between two tensors relative to the L2
+    norm of the reference tensor"""
+    return float(torch.linalg.vector_norm(tensor - reference) /
+                 torch.linalg.vector_norm(reference))
+
+
+def max_abs(tensor) -> float:
+    """The largest absolute value of a tensor, from a single reduction"""
+    return float(torch.linalg.vector_norm(tensor, ord=float('inf')))
+
+
+def match_tensors(tensor, reference, atol, rtol=1e-09):
+    """Match the values of a tensor to those of a reference tensor, within
+    the tolerances of :func:`torch.testing.assert_close`.
+
+    The values are compared in a single vectorized pass, and the mismatched
+    values are only reported if the tensors do not match.
+    """
+    try:
+        assert_close(tensor, reference, rtol=rtol, atol=atol)
+    except AssertionError as exc:
+        raise AssertionError(
+            f"{exc}\nRelative L2 error: "
+            f"{relative_error(tensor, reference):.2e}") from exc
+
+
 # Property Accessors/Mutators
 @parametrize_with_cases('expected', glob='*nmrpipe*', prefix='data_',
                         cases='...cases.nmrpipe')
-def test_nmrpipe_spectrum_properties(expected):
+def test_nmrpipe_spectrum_properties(expected, spectrum):
     """Test the NMRPipeSpectrum accessor properties"""
-    # Load the spectrum
-    print(f"Loading spectrum '{expected['filepath']}")
-    spectrum = NMRPipeSpectrum(expected['filepath'])
-
     # Configure the range types to match NMRPipe's processing
-    spectrum.freq_range_type = RangeType.FREQ
-    spectrum.time_range_type = RangeType.TIME
-    spectrum.unit_range_type = RangeType.UNIT
+    spectrum.configure_ranges(freq=RangeType.FREQ, time=RangeType.TIME,
+                              unit=RangeType.UNIT)
 
     # Check the attributes
     match_attributes(spectrum, expected)
@@ -174,12 +273,8 @@ def test_nmrpipe_spectrum_properties(expected):
 
 @parametrize_with_cases('expected', glob='*nmrpipe*', prefix='data_',
                         cases='...cases.nmrpipe')
-def test_nmrpipe_spectrum_data_layout(expected):
+def test_nmrpipe_spectrum_data_layout(expected, spectrum):
     """Test the NMRPipeSpectrum data_layout method"""
-    # Load the spectrum
-    print(f"Loading spectrum '{expected['filepath']}")
-    spectrum = NMRPipeSpectrum(expected['filepath'])
-
     for dim, data_type in enumerate(spectrum.data_type):
         data_layout = spectrum.data_layout(dim=dim, data_type=data_type)
         assert data_layout is expected['spectrum']['data_layout'][dim]
@@ -187,12 +282,8 @@ def test_nmrpipe_spectrum_data_layout(expected):
 
 @parametrize_with_cases('expected', glob='*nmrpipe*', prefix='data_',
                         cases='...cases.nmrpipe')
-def test_nmrpipe_spectrum_convert(expected):
+def test_nmrpipe_spectrum_convert(expected, spectrum):
     """Test the NMRPipeSpectrum convert method"""
-    # Load the spectrum
-    print(f"Loading spectrum '{expected['filepath']}")
-    spectrum = NMRPipeSpectrum(expected['filepath'])
-
     # Check points -> percent
     value1 = spectrum.convert(0.0, UnitType.PERCENT, UnitType.POINTS)
     value2 = spectrum.convert(100.0, UnitType.PERCENT, UnitType.POINTS)
@@ -209,22 +300,20 @@ def test_nmrpipe_spectrum_convert(expected):
     assert value2 == 100.0
     assert value3 == 100.0
 
-    # Check points -> sec
-    value1 = spectrum.convert(0, UnitType.POINTS, UnitType.SEC)
-    value2 = spectrum.convert(1, UnitType.POINTS, UnitType.SEC)
+    # Check points -> sec for the first two points together
+    points = torch.tensor([0, 1])
+    values = spectrum.convert(points, UnitType.POINTS, UnitType.SEC)
+    value1, value2 = values.tolist()
     assert (value2 - value1) ** -1 == pytest.approx(spectrum.sw_hz[-1])
 
     # Check sec -> points
-    value1 = spectrum.convert(value1, UnitType.SEC, UnitType.POINTS)
-    value2 = spectrum.convert(value2, UnitType.SEC, UnitType.POINTS)
-    assert value1 == 0.0
-    assert value2 == 1.0
+    assert torch.equal(spectrum.convert(values, UnitType.SEC, UnitType.POINTS),
+                       points)
 
-    # Check points -> Hz
-    value1 = spectrum.convert(0, UnitType.POINTS, UnitType.HZ)
-    value2 = spectrum.convert(1, UnitType.POINTS, UnitType.HZ)
-    value3 = spectrum.convert(spectrum.npts[-1] - 1, UnitType.POINTS,
-                              UnitType.HZ)
+    # Check points -> Hz for the first, second and last points together
+    points = torch.tensor([0, 1, spectrum.npts[-1] - 1])
+    values = spectrum.convert(points, UnitType.POINTS, UnitType.HZ)
+    value1, value2, value3 = values.tolist()
     assert value1 - value3 == pytest.approx(spectrum.sw_hz[-1])
 
     # Match the resolution of array_hz
@@ -233,18 +322,12 @@ def test_nmrpipe_spectrum_convert(expected):
                                             abs=0.001)
 
     # Check Hz -> points
-    value1 = spectrum.convert(value1, UnitType.HZ, UnitType.POINTS)
-    value2 = spectrum.convert(value2, UnitType.HZ, UnitType.POINTS)
-    value3 = spectrum.convert(value3, UnitType.HZ, UnitType.POINTS)
-    assert value1 == 0
-    assert value2 == 1
-    assert value3 == spectrum.npts[-1] - 1
+    assert torch.equal(spectrum.convert(values, UnitType.HZ, UnitType.POINTS),
+                       points)
 
     # Check points -> ppm
-    value1 = spectrum.convert(0, UnitType.POINTS, UnitType.PPM)
-    value2 = spectrum.convert(1, UnitType.POINTS, UnitType.PPM)
-    value3 = spectrum.convert(spectrum.npts[-1] - 1, UnitType.POINTS,
-                              UnitType.PPM)
+    values = spectrum.convert(points, UnitType.POINTS, UnitType.PPM)
+    value1, value2, value3 = values.tolist()
     assert value1 - value3 == pytest.approx(spectrum.sw_ppm[-1])
 
     # Match the resolution of array_ppm
@@ -253,78 +336,68 @@ def test_nmrpipe_spectrum_convert(expected):
                                             abs=0.0001)
 
     # Check ppm -> points
-    value1 = spectrum.convert(value1, UnitType.PPM, UnitType.POINTS)
-    value2 = spectrum.convert(value2, UnitType.PPM, UnitType.POINTS)
-    value3 = spectrum.convert(value3, UnitType.PPM, UnitType.POINTS)
-    assert value1 == 0
-    assert value2 == 1
-    assert value3 == spectrum.npts[-1] - 1
+    assert torch.equal(spectrum.convert(values, UnitType.PPM, UnitType.POINTS),
+                       points)
 
 
 @parametrize_with_cases('expected', glob='*nmrpipe*', prefix='data_',
                         cases='...cases.nmrpipe')
-def test_nmrpipe_spectrum_array_hz(expected):
+def test_nmrpipe_spectrum_array_hz(expected, spectrum):
     """Test the NMRPipeSpectrum array_hz method"""
-    # Load the spectrum
-    print(f"Loading spectrum '{expected['filepath']}")
-    spectrum = NMRPipeSpectrum(expected['filepath'])
-
     # Set the freq range type to a default freq range with endpoint.
     # [sw/2, -sw/2]
     spectrum.time_range_type = RangeType.FREQ | RangeType.ENDPOINT
 
     # Check that the frequency series respect the spectral width (within 2
     # decimal places)
-    t1 = tuple(f_rng[0] - f_rng[-1] for f_rng in spectrum.array_hz)
+    array_hz = spectrum.array_hz
+    t1 = tuple((range_points(array_hz, 0) -
+                range_points(array_hz, -1)).tolist())
     t2 = spectrum.sw_hz
     match_tuple_floats(t1, t2, abs_tol=0.01)
 
 
 @parametrize_with_cases('expected', glob='*nmrpipe*', prefix='data_',
                         cases='...cases.nmrpipe')
-def test_nmrpipe_spectrum_array_ppm(expected):
+def test_nmrpipe_spectrum_array_ppm(expected, spectrum):
     """Test the NMRPipeSpectrum array_ppm method"""
-    # Load the spectrum
-    print(f"Loading spectrum '{expected['filepath']}")
-    spectrum = NMRPipeSpectrum(expected['filepath'])
-
     # Set the freq range type to a default freq range with endpoint.
     # [sw/2, -sw/2]
     spectrum.time_range_type = RangeType.FREQ | RangeType.ENDPOINT
 
     # Check that the frequency series respect the spectral width (within 4
     # decimal places)
-    t1 = tuple(f_rng[0] - f_rng[-1] for f_rng in spectrum.array_ppm)
+    array_ppm = spectrum.array_ppm
+    t1 = tuple((range_points(array_ppm, 0) -
+                range_points(array_ppm, -1)).tolist())
     t2 = spectrum.sw_ppm
     match_tuple_floats(t1, t2, abs_tol=0.0001)
 
 
 @parametrize_with_cases('expected', glob='*nmrpipe*', prefix='data_',
                         cases='...cases.nmrpipe')
-def test_nmrpipe_spectrum_array_s(expected):
+def test_nmrpipe_spectrum_array_s(expected, spectrum):
     """Test the NMRPipeSpectrum array_s method"""
-    # Load the spectrum
-    print(f"Loading spectrum '{expected['filepath']}")
-    spectrum = NMRPipeSpectrum(expected['filepath'])
-
     # Set the time range type to a default time range [0, tmax[
     spectrum.time_range_type = RangeType.TIME
+    array_s = spectrum.array_s
 
     # Check that the time series respect the spectral widths
-    t1 = tuple((t_rng[1] - t_rng[0]) ** -1 for t_rng in spectrum.array_s)
+    t1 = tuple(((range_points(array_s, 1) -
+                 range_points(array_s, 0)) ** -1).tolist())
     t2 = spectrum.sw_hz
 
     # Collect other values used for tests below on group delay
-    t0 = tuple(t_rng[0] for t_rng in spectrum.array_s)
-    tmax = tuple(t_rng[-1] for t_rng in spectrum.array_s)
-    dw = tuple(t_rng[1] - t_rng[0] for t_rng in spectrum.array_s)
+    t0 = tuple(t_rng[0] for t_rng in array_s)
+    tmax = tuple(t_rng[-1] for t_rng in array_s)
+    dw = tuple(t_rng[1] - t_rng[0] for t_rng in array_s)
 
     # Check the starting point
-    assert all(a[0] == 0.0 for a in spectrum.array_s)
+    assert all(a[0] == 0.0 for a in array_s)
 
     # Check the resolution to within 4 decimals--i.e. 12.34234 and 12.2323 are
     # the same
-    match_tuple_floats(tuple((a[-1] - a[0])**-1 for a in spectrum.array_s),
+    match_tuple_floats(tuple((a[-1] - a[0])**-1 for a in array_s),
                        tuple(sw_hz / (npts - 1)
                              for sw_hz, npts in zip(spectrum.sw_hz,
                                                     spectrum.npts_data)),
@@ -338,17 +411,18 @@ def test_nmrpipe_spectrum_array_s(expected):
     # This will only apply to the current (last) dimension
     # [-group_delay, tmax - group_delay[
     spectrum.time_range_type = RangeType.TIME | RangeType.GROUP_DELAY
+    array_s = spectrum.array_s
 
     # Get the group delay value in seconds
     grp_delay = floor(spectrum.group_delay) * dw[-1]
 
     # Check the first point of all dims except last (current) dimension
     assert all(a[0] == 0.0
-               for a in spectrum.array_s[:-1])  # all dims except last
+               for a in array_s[:-1])  # all dims except last
 
     # Check the resolution to within 4 decimals--i.e. 12.34234 and 12.2323 are
     # the same
-    match_tuple_floats(tuple((a[-1] - a[0])**-1 for a in spectrum.array_s),
+    match_tuple_floats(tuple((a[-1] - a[0])**-1 for a in array_s),
                        tuple(sw_hz / (npts - 1)
                              for sw_hz, npts in zip(spectrum.sw_hz,
                                                     spectrum.npts_data)),
@@ -357,25 +431,26 @@ def test_nmrpipe_spectrum_array_s(expected):
     # Check the first point of the last (current) dimension
     if spectrum.correct_digital_filter:
         # Digital filter correction needed
-        assert spectrum.array_s[-1][0] == pytest.approx(t0[-1] - grp_delay)
+        assert array_s[-1][0] == pytest.approx(t0[-1] - grp_delay)
     else:
         # No digital filter correction needed. Group delay not applied
-        assert spectrum.array_s[-1][0] == 0.0
+        assert array_s[-1][0] == 0.0
 
     # Check the last point of all dims except last (current) dimension
     assert all(a[-1] == pytest.approx(tmax)
-               for a, tmax in zip(spectrum.array_s[:-1], tmax))
+               for a, tmax in zip(array_s[:-1], tmax))
 
     # Check the last point of the last (current) dimension
     if spectrum.correct_digital_filter:
         # Digital filter correction needed
-        assert spectrum.array_s[-1][-1] == pytest.approx(tmax[-1] - grp_delay)
+        assert array_s[-1][-1] == pytest.approx(tmax[-1] - grp_delay)
     else:
         # No digital filter correction needed. Group delay not applied
-        assert spectrum.array_s[-1][-1] == pytest.approx(tmax[-1])
+        assert array_s[-1][-1] == pytest.approx(tmax[-1])
 
     # Check that the time series respect the spectral widths
-    t1 = tuple((t_rng[1] - t_rng[0]) ** -1 for t_rng in spectrum.array_s)
+    t1 = tuple(((range_points(array_s, 1) -
+                 range_points(array_s, 0)) ** -1).tolist())
     t2 = spectrum.sw_hz
 
     # Match the range values to within 1 decimals--i.e. 8392.13 and 8392.12
@@ -390,30 +465,84 @@ def test_nmrpipe_spectrum_array_s(expected):
     ('*nmrpipe_complex_spectrum_1d', '*nmrpipe_complex_fid_2d',
      '*nmrpipe_real_spectrum_singlefile_3d'), cases='...cases.nmrpipe',
     prefix='data_'))
-def test_nmrpipe_spectrum_load_save(expected, tmpdir):
+def test_nmrpipe_spectrum_load_save(expected, save_spectrum, load_spectrum):
     """Test the NMRPipeSpectrum load/save methods"""
-    # Load the spectrum
-    print(f"Loading spectrum '{expected['filepath']}")
-    spectrum = NMRPipeSpectrum(expected['filepath'])
+    # Save the spectrum
+    out_filepath = save_spectrum(expected['filepath'])
+    spectrum = load_spectrum(expected['filepath'], copy=False)
+
+    # Check the saved header against the loaded spectrum's header. The data
+    # ranges are recalculated when saving. The spectrum's attributes are
+    # derived from the header, and these are checked in
+    # test_nmrpipe_spectrum_properties
+    with open(out_filepath, 'rb') as f:
+        meta = load_nmrpipe_meta(f)
+    match_metas(meta, spectrum.meta,
+                skip=('FDMAX', 'FDMIN', 'FDDISPMAX', 'FDDISPMIN'))
+
+    # Check that the saved data matches the original data, byte-for-byte
+    saved_bytes = Path(out_filepath).read_bytes()
+    original_bytes = Path(expected['filepath']).read_bytes()
+    assert (saved_bytes[header_size_bytes:] ==
+            original_bytes[header_size_bytes:])
+
 
+@pytest.mark.parametrize('expected', parametrize_casesets(
+    '*nmrpipe_complex_spectrum_1d', cases='...cases.nmrpipe', prefix='data_'))
+def test_nmrpipe_spectrum_save_overwrite(expected, save_spectrum,
+                                         load_spectrum):
+    """Test that the NMRPipeSpectrum save method does not overwrite existing
+    files, if specified"""
     # Save the spectrum
-    out_filepath = Path(tmpdir) / expected['filepath'].name
-    spectrum.save(out_filepath=out_filepath, overwrite=False)  # new spectrum
+    out_filepath = save_spectrum(expected['filepath'])
 
     # Saving without overwrite with raise an exceptions
+    spectrum = load_spectrum(expected['filepath'])
     with pytest.raises(FileExistsError):
         spectrum.save(out_filepath=out_filepath, overwrite=False)
 
-    # Reload the spectrum
-    spectrum = NMRPipeSpectrum(out_filepath)
 
-    # Configure the range types to match NMRPipe's processing
-    spectrum.freq_range_type = RangeType.FREQ
-    spectrum.time_range_type = RangeType.TIME
-    spectrum.unit_range_type = RangeType.UNIT
+@pytest.mark.parametrize('expected', parametrize_casesets(
+    ('*nmrpipe_complex_spectrum_1d', '*nmrpipe_complex_fid_2d'),
+    cases='...cases.nmrpipe', prefix='data_'))
+def test_nmrpipe_spectrum_save_fileobj(expected, save_spectrum,
+                                       load_spectrum):
+    """Test the NMRPipeSpectrum save method with an in-memory file object"""
+    # Save the spectrum to a file on disk and to a file object
+    out_filepath = save_spectrum(expected['filepath'])
+    spectrum = load_spectrum(expected['filepath'])
+    buf = BytesIO()
+    spectrum.save(out_filepath=buf)
+
+    # The file object is not closed, and the header can be read back from it.
+    # The data ranges are recalculated when saving
+    buf.seek(0)
+    meta = load_nmrpipe_meta(buf)
+    match_metas(meta, spectrum.meta,
+                skip=('FDMAX', 'FDMIN', 'FDDISPMAX', 'FDDISPMIN'))
+
+    # Check that the file object contents match the saved file
+    assert buf.getvalue() == Path(out_filepath).read_bytes()
 
-    # Check the attributes
-    match_attributes(spectrum, expected)
+
+@pytest.mark.parametrize('expected', parametrize_casesets(
+    '*nmrpipe_complex_spectrum_1d', cases='...cases.nmrpipe', prefix='data_'))
+def test_nmrpipe_spectrum_save_real_component(expected, load_spectrum,
+                                              tmp_path):
+    """Test the NMRPipeSpectrum save method with the (strided) real component
+    of a complex spectrum"""
+    # Discarding the imaginaries keeps a strided view of the real component
+    spectrum = load_spectrum(expected['filepath'])
+    spectrum.phase(p0=0.0, p1=0.0, discard_imaginaries=True)
+    assert not spectrum.data.is_contiguous()
+
+    # Save and reload the spectrum
+    out_filepath = tmp_path / expected['filepath'].name
+    spectrum.save(out_filepath=out_filepath)
+    meta, tensor = load_nmrpipe_tensor(out_filepath, shared=False)
+
+    assert not tensor.is_complex()
+    assert torch.equal(tensor, spectrum.data)
 
 
 # Mutators/Processing methods
@@ -423,13 +552,11 @@ def test_nmrpipe_spectrum_load_save(expected, tmpdir):
                                               '*nmrpipe_complex_fid_em_1d',
                                               cases='...cases.nmrpipe',
                                               prefix='data_'))
-def test_nmrpipe_spectrum_apodization_exp(expected, expected_em):
+def test_nmrpipe_spectrum_apodization_exp(expected, expected_em,
+                                          load_spectra):
     """Test the NMRPipeSpectrum apodization_exp method"""
-    # Load the spectrum and its transpose
-    print(f"Loading spectra: '{expected['filepath']}' and "
-          f"'{expected_em['filepath']}'")
-    spectrum = NMRPipeSpectrum(expected['filepath'])
-    spectrum_em = NMRPipeSpectrum(expected_em['filepath'])
+    # Load the spectrum and its reference spectrum
+    spectrum, spectrum_em = load_spectra(expected, expected_em)
 
     # Configure the range types to match NMRPipe's processing
     spectrum.time_range_type = RangeType.TIME
@@ -451,14 +578,12 @@ def test_nmrpipe_spectrum_apodization_exp(expected, expected_em):
     match_metas(spectrum.meta, spectrum_em.meta)
     assert spectrum.apodization[0] == ApodizationType.EXPONENTIAL
 
-    # Find the tolerance for float errors
-    tol = spectrum.data.real.max() * 0.0001
+    # Find the tolerance for float errors from the reference spectrum
+    tol = float(spectrum_em.data.real.max()) * 0.0001
 
     # Check the values
     if spectrum.ndims == 1:
-        for row, (i, j) in enumerate(zip(spectrum.data, spectrum_em.data)):
-            print(f"Row #{row}: {i}, {j}")
-            assert isclose(i, j, abs_tol=tol)
+        match_tensors(spectrum.data, spectrum_em.data, atol=tol)
     else:
         raise NotImplementedError
 
@@ -469,13 +594,11 @@ def test_nmrpipe_spectrum_apodization_exp(expected, expected_em):
                                               '*nmrpipe_complex_fid_sp_1d',
                                               cases='...cases.nmrpipe',
                                               prefix='data_'))
-def test_nmrpipe_spectrum_apodization_sine(expected, expected_sp):
+def test_nmrpipe_spectrum_apodization_sine(expected, expected_sp,
+                                           load_spectra):
     """Test the NMRPipeSpectrum apodization_size method"""
-    # Load the spectrum and its transpose
-    print(f"Loading spectra: '{expected['filepath']}' and "
-          f"'{expected_sp['filepath']}'")
-    spectrum = NMRPipeSpectrum(expected['filepath'])
-    spectrum_sp = NMRPipeSpectrum(expected_sp['filepath'])
+    # Load the spectrum and its reference spectrum
+    spectrum, spectrum_sp = load_spectra(expected, expected_sp)
 
     # Configure the range types to match NMRPipe's processing
     spectrum.unit_range_type = RangeType.UNIT
@@ -499,13 +622,12 @@ def test_nmrpipe_spectrum_apodization_sine(expected, expected_sp):
     match_metas(spectrum.meta, spectrum_sp.meta)
     assert spectrum.apodization[0] == ApodizationType.SINEBELL
 
-    # Find the tolerance for float errors
-    tol = spectrum.data.real.max() * 0.0002
+    # Find the tolerance for float errors from the reference spectrum
+    tol = float(spectrum_sp.data.real.max()) * 0.0002
 
     # Check the values
     if spectrum.ndims == 1:
-        for row, (i, j) in enumerate(zip(spectrum.data, spectrum_sp.data)):
-            assert isclose(i, j, abs_tol=tol)
+        match_tensors(spectrum.data, spectrum_sp.data, atol=tol)
     else:
         raise NotImplementedError
 
@@ -520,13 +642,10 @@ def test_nmrpipe_spectrum_apodization_sine(expected, expected_sp):
                                               '*nmrpipe_complex_fid_ext*_1d',
                                               cases='...cases.nmrpipe',
                                               prefix='data_'))
-def test_nmrpipe_spectrum_ext(expected, expected_ext):
+def test_nmrpipe_spectrum_ext(expected, expected_ext, load_spectra):
     """Test the NMRPipeSpectrum ft method"""
-    # Load the spectrum, if needed (cache for future tests)
-    print(f"Loading spectra: '{expected['filepath']}' and "
-          f"'{expected_ext['filepath']}'")
-    spectrum = NMRPipeSpectrum(expected['filepath'])
-    spectrum_ext = NMRPipeSpectrum(expected_ext['filepath'])
+    # Load the spectrum and its reference spectrum
+    spectrum, spectrum_ext = load_spectra(expected, expected_ext)
 
     # Set the default NMRPipe range types
     spectrum.freq_range_type = RangeType.FREQ
@@ -549,7 +668,6 @@ def test_nmrpipe_spectrum_ext(expected, expected_ext):
 
     # Discard imaginaries if the spectrum_ext is real data only
     if spectrum.data.is_complex() and not spectrum_ext.data.is_complex():
-        dim = spectrum.order[-1]
         spectrum.data = spectrum.data.real
 
         # Update header values to reflect the change in data type
@@ -566,14 +684,14 @@ def test_nmrpipe_spectrum_ext(expected, expected_ext):
     # Compare to the reference dataset
     match_metas(spectrum.meta, spectrum_ext.meta)
 
-    # Find the tolerance for float errors
-    tol = (spectrum.data.real.max() * 0.0002 if spectrum.data.is_complex() else
-           spectrum.data.max() * 0.002)
+    # Find the tolerance for float errors from the reference spectrum
+    tol = (float(spectrum_ext.data.real.max()) * 0.0002
+           if spectrum_ext.data.is_complex() else
+           float(spectrum_ext.data.max()) * 0.002)
 
     # Check the values
     if spectrum.ndims == 1:
-        for row, (i, j) in enumerate(zip(spectrum.data, spectrum_ext.data)):
-            assert isclose(i, j, abs_tol=tol)
+        match_tensors(spectrum.data, spectrum_ext.data, atol=tol)
     else:
         raise NotImplementedError
 
@@ -584,13 +702,10 @@ def test_nmrpipe_spectrum_ext(expected, expected_ext):
                                               '*nmrpipe_complex_fid_ft_1d',
                                               cases='...cases.nmrpipe',
                                               prefix='data_'))
-def test_nmrpipe_spectrum_ft(expected, expected_ft):
+def test_nmrpipe_spectrum_ft(expected, expected_ft, load_spectra):
     """Test the NMRPipeSpectrum ft method"""
-    # Load the spectrum, if needed (cache for future tests)
-    print(f"Loading spectra: '{expected['filepath']}' and "
-          f"'{expected_ft['filepath']}'")
-    spectrum = NMRPipeSpectrum(expected['filepath'])
-    spectrum_ft = NMRPipeSpectrum(expected_ft['filepath'])
+    # Load the spectrum and its reference spectrum
+    spectrum, spectrum_ft = load_spectra(expected, expected_ft)
 
     # Conduct the Fourier transform
     spectrum.ft()
@@ -603,38 +718,54 @@ def test_nmrpipe_spectrum_ft(expected, expected_ft):
                 skip=('FDMAX', 'FDMIN', 'FDDISPMAX', 'FDDISPMIN'))
 
     # Compare the power spectra, which are phase insensitive
-    pow_spectrum = torch.sqrt(spectrum.data.real ** 2 +
-                              spectrum.data.imag ** 2)
-    pow_spectrum_ft = torch.sqrt(spectrum_ft.data.real ** 2 +
-                                 spectrum_ft.data.imag ** 2)
+    pow_spectrum = torch.abs(spectrum.data)
+    pow_spectrum_ft = torch.abs(spectrum_ft.data)
 
     # Find a tolerance for matching numbers. The numbers do not exactly match
     # the reference dataset due to rounding errors (presumably)
-    tol = max(abs(pow_spectrum_ft.max()), abs(pow_spectrum_ft.min())) * 0.00001
+    # The power spectrum is not negative, so its maximum is the largest value
+    tol = float(pow_spectrum_ft.amax()) * 0.00001
 
     if spectrum.ndims == 1:
-        # Check the normalized values, row-by-row
-        for count, (i, j) in enumerate(zip(pow_spectrum, pow_spectrum_ft)):
-            print(f"Row#{count}: "
-                  f"{i}, {j}")
-            assert isclose(i, j, abs_tol=tol)
+        # Check the normalized values
+        match_tensors(pow_spectrum, pow_spectrum_ft, atol=tol)
     else:
         raise NotImplementedError
 
 
+@pytest.mark.parametrize('expected', parametrize_casesets(
+    '*nmrpipe_complex_fid_2d', cases='...cases.nmrpipe', prefix='data_'))
+def test_nmrpipe_spectrum_ft_rows(expected, load_spectrum):
+    """Test that the NMRPipeSpectrum ft method with digital filter correction
+    transforms the rows of a 2D spectrum independently"""
+    # Fourier transform the 2D spectrum
+    spectrum = load_spectrum(expected['filepath'])
+    assert spectrum.correct_digital_filter
+    spectrum.ft()
+
+    # Find a tolerance for matching numbers between the batched and single
+    # row Fourier transforms
+    tol = max_abs(spectrum.data) * 0.00001
+
+    # The digital filter correction rolls each row, so the first and last rows
+    # match the Fourier transforms of the rows on their own
+    for index in (0, -1):
+        row = load_spectrum(expected['filepath'])
+        row.data = row.data[index].reshape(1, -1)
+        row.ft()
+        match_tensors(spectrum.data[index], row.data[0], atol=tol)
+
+
 # See cases_nmrpipe_spectrum.py for a listing of test cases
 @pytest.mark.parametrize('expected, expected_ps',
                          parametrize_casesets('*nmrpipe_complex_spectrum_1d',
                                               '*nmrpipe_complex_spectrum_ps_1d',
                                               cases='...cases.nmrpipe',
                                               prefix='data_'))
-def test_nmrpipe_spectrum_phase(expected, expected_ps):
+def test_nmrpipe_spectrum_phase(expected, expected_ps, load_spectra):
     """Test the NMRPipeSpectrum phase method"""
-    # Load the spectrum and its transpose
-    print(f"Loading spectra: '{expected['filepath']}' and "
-          f"'{expected_ps['filepath']}'")
-    spectrum = NMRPipeSpectrum(expected['filepath'])
-    spectrum_ps = NMRPipeSpectrum(expected_ps['filepath'])
+    # Load the spectrum and its reference spectrum
+    spectrum, spectrum_ps = load_spectra(expected, expected_ps)
 
     # Configure the range types to match NMRPipe's processing
     spectrum.unit_range_type = RangeType.UNIT
@@ -652,16 +783,13 @@ def test_nmrpipe_spectrum_phase(expected, expected_ps):
 
     # Find a tolerance for matching numbers. The numbers do not exactly match
     # the reference dataset due to rounding errors (presumably)
-    tol = max(abs(spectrum.data.max()), abs(spectrum.data.min())) * 0.0001
+    tol = max_abs(spectrum.data) * 0.0001
 
-    # Check the values, row-by-row
+    # Check the values
     if spectrum.ndims == 1:
-        for count, (i, j) in enumerate(zip(spectrum.data, spectrum_ps.data)):
-            assert isclose(i, j, abs_tol=tol)
+        match_tensors(spectrum.data, spectrum_ps.data, atol=tol)
     else:
-        for i, (row1, row2) in enumerate(zip(spectrum.data, spectrum_ps.data)):
-            print(f"Row #{i}")
-            assert all(isclose(i, j) for i, j in zip(row1, row2))
+        match_tensors(spectrum.data, spectrum_ps.data, atol=0.0)
 
 
 # See cases_nmrpipe_spectrum.py for a listing of test cases
@@ -670,36 +798,33 @@ def test_nmrpipe_spectrum_phase(expected, expected_ps):
                                               '*nmrpipe_complex_fid_tp_2d',
                                               cases='...cases.nmrpipe',
                                               prefix='data_'))
-def test_nmrpipe_spectrum_transpose(expected, expected_tp):
+def test_nmrpipe_spectrum_transpose(expected, expected_tp, load_spectra):
     """Test the NMRPipeSpectrum transpose method"""
-    # Load the spectrum and its transpose
-    print(f"Loading spectra: '{expected['filepath']}' and "
-          f"'{expected_tp['filepath']}'")
-    spectrum = NMRPipeSpectrum(expected['filepath'])
-    spectrum_tp = NMRPipeSpectrum(expected_tp['filepath'])
+    # Load the spectrum and its reference spectrum
+    spectrum, spectrum_tp = load_spectra(expected, expected_tp)
 
     # Try reversing the last 2 axes
-    dims = list(range(spectrum.ndims))
-    spectrum.transpose(dims[-1], dims[-2])
+    spectrum.transpose(spectrum.ndims - 1, spectrum.ndims - 2)
 
     # Check the header
     match_metas(spectrum.meta, spectrum_tp.meta)
 
     # Check attributes to see if they were transposed correctly
-    for attr in ('domain_type', 'data_type', 'sw_hz', 'sw_ppm', 'car_hz',
-                 'car_ppm', 'obs_mhz', 'label'):
-        print(f"spectrum1 attr: '{getattr(spectrum, attr)}', "
-              f"spectrum1_tp attr: '{getattr(spectrum_tp, attr)}'")
-        assert getattr(spectrum, attr) == getattr(spectrum_tp, attr)
+    get_tp_attrs = operator.attrgetter('domain_type', 'data_type', 'sw_hz',
+                                       'sw_ppm', 'car_hz', 'car_ppm',
+                                       'obs_mhz', 'label')
+    assert get_tp_attrs(spectrum) == get_tp_attrs(spectrum_tp)
 
     # Check the data shape
     assert spectrum.data.size() == spectrum_tp.data.size()
 
-    # Check the values, row-by-row
+    # Check the values
     if spectrum.ndims > 1:
-        for i, (row1, row2) in enumerate(zip(spectrum.data, spectrum_tp.data)):
-            print(f"Row #{i}")
-            assert tuple(row1) == tuple(row2)
+        if not torch.equal(spectrum.data, spectrum_tp.data):
+            mismatched = torch.nonzero(spectrum.data != spectrum_tp.data)
+            pytest.fail(f"{len(mismatched)} of {spectrum.data.numel()} "
+                        f"transposed values do not match. First mismatches "
+                        f"at: {mismatched[:5].tolist()}")
     else:
         raise NotImplementedError
 
@@ -718,13 +843,10 @@ def test_nmrpipe_spectrum_transpose(expected, expected_tp):
                                               '*nmrpipe_complex_fid_zf_2d',
                                               cases='...cases.nmrpipe',
                                               prefix='data_'))
-def test_nmrpipe_spectrum_zerofill(expected, expected_zf):
+def test_nmrpipe_spectrum_zerofill(expected, expected_zf, load_spectra):
     """Test the NMRPipeSpectrum zerofill method"""
-    # Load the spectrum and its transpose
-    print(f"Loading spectra: '{expected['filepath']}' and "
-          f"'{expected_zf['filepath']}'")
-    spectrum = NMRPipeSpectrum(expected['filepath'])
-    spectrum_ps = NMRPipeSpectrum(expected_zf['filepath'])
+    # Load the spectrum and its reference spectrum
+    spectrum, spectrum_ps = load_spectra(expected, expected_zf)
 
     # Get the phase to use
     dim = spectrum_ps.order[-1]
@@ -738,18 +860,12 @@ def test_nmrpipe_spectrum_zerofill(expected, expected_zf):
 
     # Find a tolerance for matching numbers. The numbers do not exactly match
     # the reference dataset due to rounding errors (presumably)
-    if spectrum.data.is_complex():
-        tol = (max(abs(spectrum.data.real.max()),
-                   abs(spectrum.data.real.min())) * 0.0001)
-    else:
-        tol = max(abs(spectrum.data.max()), abs(spectrum.data.min())) * 0.0001
+    tol = max_abs(spectrum.data.real if spectrum.data.is_complex() else
+                  spectrum.data) * 0.0001
 
-    # Check the values, row-by-row
+    # Check the values
     if spectrum.ndims == 1:
-        for count, (i, j) in enumerate(zip(spectrum.data, spectrum_ps.data)):
-            assert isclose(i, j, abs_tol=tol)
+        match_tensors(spectrum.data, spectrum_ps.data, atol=tol)
     else:
-        for i, (row1, row2) in enumerate(zip(spectrum.data, spectrum_ps.data)):
-            print(f"Row #{i}")
-            assert all(isclose(i, j) for i, j in zip(row1, row2))
+        match_tensors(spectrum.data, spectrum_ps.data, atol=0.0)
 
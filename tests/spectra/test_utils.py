@@ -8,192 +8,229 @@ from pocketchemist_nmr.spectra.utils import (combine_block_from_complex,
                                              combine_single_from_complex,
                                              split_block_to_complex,
                                              split_single_to_complex,
+                                             split_single_to_soa,
                                              interleave_block_to_single,
                                              interleave_single_to_block,
                                              gen_range, range_endpoints,
                                              RangeType)
 
 
-def test_interleave_block_to_single():
-    """Test interleave_block_to_single function"""
-    # Create the test data
-    # Block interleave along N, single interleave along M
-    N = 3  # Number of complex points on X-axis
-    M = 5  # Number of complex points on Y-axis
-
-    #  [[ 0.,  1.,  2.,  3.,  4.,  5.],  (Real XN + Imag XN / Real Y1)
-    #   [ 6.,  7.,  8.,  9., 10., 11.],  (Real XN + Imag XN / Imag Y1)
-    #   [12., 13., 14., 15., 16., 17.],  (Real XN + Imag XN / Real Y2)
-    #   [18., 19., 20., 21., 22., 23.],  (Real XN + Imag XN / Imag Y2)
-    #   [24., 25., 26., 27., 28., 29.],  (Real XN + Imag XN / Real Y3)
-    #   [30., 31., 32., 33., 34., 35.],  (Real XN + Imag XN / Real Y3)
-    #   [36., 37., 38., 39., 40., 41.],  (Real XN + Imag XN / Real Y4)
-    #   [42., 43., 44., 45., 46., 47.],  (Real XN + Imag XN / Real Y4)
-    #   [48., 49., 50., 51., 52., 53.],  (Real XN + Imag XN / Real Y5)
-    #   [54., 55., 56., 57., 58., 59.]]  (Real XN + Imag XN / Real Y5)
-    data = torch.arange(float(N * 2 * M * 2)).reshape(M * 2, N * 2)
+#: Number of complex points on the X-axis of the hypercomplex test data
+N = 3
 
-    # Single interleave the dataset
-    # [[ 0.,  3.,  1.,  4.,  2.,  5.],
-    #  [ 6.,  9.,  7., 10.,  8., 11.],
-    #  [12., 15., 13., 16., 14., 17.],
-    #  [18., 21., 19., 22., 20., 23.],
-    #  [24., 27., 25., 28., 26., 29.],
-    #  [30., 33., 31., 34., 32., 35.],
-    #  [36., 39., 37., 40., 38., 41.],
-    #  [42., 45., 43., 46., 44., 47.],
-    #  [48., 51., 49., 52., 50., 53.],
-    #  [54., 57., 55., 58., 56., 59.]]
-    single_interleave = interleave_block_to_single(data)
+#: Number of complex points on the Y-axis of the hypercomplex test data
+M = 5
 
-    # Check the size and the first and last row
-    assert single_interleave.size() == (M * 2, N * 2)
-    assert tuple(single_interleave[0]) == (0., 3., 1., 4., 2., 5.)
-    assert tuple(single_interleave[-1]) == (54., 57., 55., 58., 56., 59.)
-
-    # The tensors use the same storage
-    #assert id(data.storage()) == id(single_interleave.storage())
-
-
-def test_interleave_single_to_block():
-    """Test interleave_single_to_block function."""
-    # Create the test data
-    # Block interleave along N, single interleave along M
-    N = 3  # Number of complex points on X-axis
-    M = 5  # Number of complex points on Y-axis
-
-    #  [[ 0.,  1.,  2.,  3.,  4.,  5.],  (Real XN + Imag XN / Real Y1)
-    #   [ 6.,  7.,  8.,  9., 10., 11.],  (Real XN + Imag XN / Imag Y1)
-    #   [12., 13., 14., 15., 16., 17.],  (Real XN + Imag XN / Real Y2)
-    #   [18., 19., 20., 21., 22., 23.],  (Real XN + Imag XN / Imag Y2)
-    #   [24., 25., 26., 27., 28., 29.],  (Real XN + Imag XN / Real Y3)
-    #   [30., 31., 32., 33., 34., 35.],  (Real XN + Imag XN / Real Y3)
-    #   [36., 37., 38., 39., 40., 41.],  (Real XN + Imag XN / Real Y4)
-    #   [42., 43., 44., 45., 46., 47.],  (Real XN + Imag XN / Real Y4)
-    #   [48., 49., 50., 51., 52., 53.],  (Real XN + Imag XN / Real Y5)
-    #   [54., 55., 56., 57., 58., 59.]]  (Real XN + Imag XN / Real Y5)
-    data = torch.arange(float(N * 2 * M * 2)).reshape(M * 2, N * 2)
+#: The expected first and last rows of the single-interleaved test data
+single_interleave_rows = torch.tensor([[0., 3., 1., 4., 2., 5.],
+                                       [54., 57., 55., 58., 56., 59.]])
 
-    # Block interleave the dataset
-    # [[ 0.,  2.,  4.,  1.,  3.,  5.],
-    #  [ 6.,  8., 10.,  7.,  9., 11.],
-    #  [12., 14., 16., 13., 15., 17.],
-    #  [18., 20., 22., 19., 21., 23.],
-    #  [24., 26., 28., 25., 27., 29.],
-    #  [30., 32., 34., 31., 33., 35.],
-    #  [36., 38., 40., 37., 39., 41.],
-    #  [42., 44., 46., 43., 45., 47.],
-    #  [48., 50., 52., 49., 51., 53.],
-    #  [54., 56., 58., 55., 57., 59.]]
-    block_interleave = interleave_single_to_block(data)
+#: The expected first and last rows of the block-interleaved test data
+block_interleave_rows = torch.tensor([[0., 2., 4., 1., 3., 5.],
+                                      [54., 56., 58., 55., 57., 59.]])
 
-    # Check the size and the first and last row
-    assert block_interleave.size() == (M * 2, N * 2)
-    assert tuple(block_interleave[0]) == (0., 2., 4., 1., 3., 5.)
-    assert tuple(block_interleave[-1]) == (54., 56., 58., 55., 57., 59.)
-
-    # The tensors use the same storage
-    #assert id(data.storage()) == id(block_interleave.storage())
-
-
-def test_combine_split_block_complex_hypercomplex_2d():
-    """Test the combine_block_from_complex and split_block_to_complex functions
-    with a hypercomplex 2D"""
-    # Create a test 2D (from fdatap.h)
-    # (N X-Axis=Real Values for Y-Axis Increment 1 Real)
-    # (N X-Axis=Imag Values for Y-Axis Increment 1 Real)
-    # (N X-Axis=Real Values for Y-Axis Increment 1 Imag)
-    # (N X-Axis=Imag Values for Y-Axis Increment 1 Imag)
-    # ...
-    # (N X-Axis=Real Values for Y-Axis Increment M Imag)
-    # (N X-Axis=Imag Values for Y-Axis Increment M Imag)
-    # Block interleave along N, single interleave along M
-    N = 3  # Number of complex points on X-axis
-    M = 5  # Number of complex points on Y-axis
-
-    #  [[ 0.,  1.,  2.,  3.,  4.,  5.],  (Real XN + Imag XN / Real Y1)
-    #   [ 6.,  7.,  8.,  9., 10., 11.],  (Real XN + Imag XN / Imag Y1)
-    #   [12., 13., 14., 15., 16., 17.],  (Real XN + Imag XN / Real Y2)
-    #   [18., 19., 20., 21., 22., 23.],  (Real XN + Imag XN / Imag Y2)
-    #   [24., 25., 26., 27., 28., 29.],  (Real XN + Imag XN / Real Y3)
-    #   [30., 31., 32., 33., 34., 35.],  (Real XN + Imag XN / Real Y3)
-    #   [36., 37., 38., 39., 40., 41.],  (Real XN + Imag XN / Real Y4)
-    #   [42., 43., 44., 45., 46., 47.],  (Real XN + Imag XN / Real Y4)
-    #   [48., 49., 50., 51., 52., 53.],  (Real XN + Imag XN / Real Y5)
-    #   [54., 55., 56., 57., 58., 59.]]  (Real XN + Imag XN / Real Y5)
-    data = torch.arange(float(N * 2 * M * 2)).reshape(M * 2, N * 2)
+#: The expected first and last rows of the block-interleaved test data split
+#: to complex numbers
+split_block_rows = torch.view_as_complex(
+    torch.tensor([[[0., 3.], [1., 4.], [2., 5.]],
+                  [[54., 57.], [55., 58.], [56., 59.]]]))
 
-    # Split to complex into a real/complex dataset
-    # [[ 0.+3.j,  1.+4.j,  2.+5.j],
-    #  [ 6.+9.j,  7.+10.j,  8.+11.j],
-    #  [12.+15.j, 13.+16.j, 14.+17.j],
-    #  [18.+21.j, 19.+22.j, 20.+23.j],
-    #  [24.+27.j, 25.+28.j, 26.+29.j],
-    #  [30.+33.j, 31.+34.j, 32.+35.j],
-    #  [36.+39.j, 37.+40.j, 38.+41.j],
-    #  [42.+45.j, 43.+46.j, 44.+47.j],
-    #  [48.+51.j, 49.+52.j, 50.+53.j],
-    #  [54.+57.j, 55.+58.j, 56.+59.j]]
-    cmplx = split_block_to_complex(data)
+#: The expected first and last rows of the test data split to complex numbers
+#: as single-interleaved data
+split_single_rows = torch.view_as_complex(
+    torch.tensor([[[0., 1.], [2., 3.], [4., 5.]],
+                  [[54., 55.], [56., 57.], [58., 59.]]]))
+
+
+@pytest.fixture(scope='module')
+def hypercomplex_2d():
+    """A hypercomplex 2D test dataset, shared by the tests of this module.
+
+    The dataset is block interleaved along N and single interleaved along M
+    (from fdatap.h). Tests should not modify it.
+
+    (N X-Axis=Real Values for Y-Axis Increment 1 Real)
+    (N X-Axis=Imag Values for Y-Axis Increment 1 Real)
+    (N X-Axis=Real Values for Y-Axis Increment 1 Imag)
+    (N X-Axis=Imag Values for Y-Axis Increment 1 Imag)
+    ...
+    (N X-Axis=Real Values for Y-Axis Increment M Imag)
+    (N X-Axis=Imag Values for Y-Axis Increment M Imag)
+
+     [[ 0.,  1.,  2.,  3.,  4.,  5.],  (Real XN + Imag XN / Real Y1)
+      [ 6.,  7.,  8.,  9., 10., 11.],  (Real XN + Imag XN / Imag Y1)
+      [12., 13., 14., 15., 16., 17.],  (Real XN + Imag XN / Real Y2)
+      [18., 19., 20., 21., 22., 23.],  (Real XN + Imag XN / Imag Y2)
+      [24., 25., 26., 27., 28., 29.],  (Real XN + Imag XN / Real Y3)
+      [30., 31., 32., 33., 34., 35.],  (Real XN + Imag XN / Imag Y3)
+      [36., 37., 38., 39., 40., 41.],  (Real XN + Imag XN / Real Y4)
+      [42., 43., 44., 45., 46., 47.],  (Real XN + Imag XN / Imag Y4)
+      [48., 49., 50., 51., 52., 53.],  (Real XN + Imag XN / Real Y5)
+      [54., 55., 56., 57., 58., 59.]]  (Real XN + Imag XN / Imag Y5)
+    """
+    return torch.arange(float(N * 2 * M * 2)).reshape(M * 2, N * 2)
+
+
+@pytest.mark.parametrize('interleave, expected_rows', (
+    (interleave_block_to_single, single_interleave_rows),
+    (interleave_single_to_block, block_interleave_rows),
+), ids=('block_to_single', 'single_to_block'))
+def test_interleave(hypercomplex_2d, interleave, expected_rows):
+    """Test the interleave_block_to_single and interleave_single_to_block
+    functions"""
+    data = hypercomplex_2d
+
+    # Interleave the dataset
+    interleaved = interleave(data)
 
     # Check the size and the first and last row
-    assert cmplx.size() == (M * 2, N)
-    assert tuple(cmplx[0]) == (0. + 3.j, 1. + 4.j, 2 + 5.j)
-    assert tuple(cmplx[-1]) == (54. + 57.j, 55. + 58.j, 56 + 59.j)
+    assert interleaved.size() == (M * 2, N * 2)
+    assert torch.equal(interleaved[[0, -1]], expected_rows)
 
-    # Reorganize into a real/real tensor
-    combined = combine_block_from_complex(cmplx)
-    assert torch.all(torch.eq(combined, data))
-
-
-def test_combine_split_single_complex_hypercomplex_2d():
-    """Test the combine_single_from_complex and split_single_to_complex
-    functions with a hypercomplex 2D"""
-    # Create a test 2D (from fdatap.h)
-    # (N X-Axis=Real Values for Y-Axis Increment 1 Real)
-    # (N X-Axis=Imag Values for Y-Axis Increment 1 Real)
-    # (N X-Axis=Real Values for Y-Axis Increment 1 Imag)
-    # (N X-Axis=Imag Values for Y-Axis Increment 1 Imag)
-    # ...
-    # (N X-Axis=Real Values for Y-Axis Increment M Imag)
-    # (N X-Axis=Imag Values for Y-Axis Increment M Imag)
-    # Block interleave along N, single interleave along M
-    N = 3  # Number of complex points on X-axis
-    M = 5  # Number of complex points on Y-axis
-
-    #  [[ 0.,  1.,  2.,  3.,  4.,  5.],  (Real XN + Imag XN / Real Y1)
-    #   [ 6.,  7.,  8.,  9., 10., 11.],  (Real XN + Imag XN / Imag Y1)
-    #   [12., 13., 14., 15., 16., 17.],  (Real XN + Imag XN / Real Y2)
-    #   [18., 19., 20., 21., 22., 23.],  (Real XN + Imag XN / Imag Y2)
-    #   [24., 25., 26., 27., 28., 29.],  (Real XN + Imag XN / Real Y3)
-    #   [30., 31., 32., 33., 34., 35.],  (Real XN + Imag XN / Real Y3)
-    #   [36., 37., 38., 39., 40., 41.],  (Real XN + Imag XN / Real Y4)
-    #   [42., 43., 44., 45., 46., 47.],  (Real XN + Imag XN / Real Y4)
-    #   [48., 49., 50., 51., 52., 53.],  (Real XN + Imag XN / Real Y5)
-    #   [54., 55., 56., 57., 58., 59.]]  (Real XN + Imag XN / Real Y5)
-    data = torch.arange(float(N * 2 * M * 2)).reshape(M * 2, N * 2)
+    # Higher dimension tensors are interleaved along the last dimension
+    assert torch.equal(interleave(data.reshape(M, 2, N * 2)),
+                       interleaved.reshape(M, 2, N * 2))
+
+
+@pytest.mark.parametrize('split, combine, expected_rows', (
+    (split_block_to_complex, combine_block_from_complex, split_block_rows),
+    (split_single_to_complex, combine_single_from_complex, split_single_rows),
+), ids=('block', 'single'))
+def test_combine_split_complex_hypercomplex_2d(hypercomplex_2d, split,
+                                               combine, expected_rows):
+    """Test the combine_block_from_complex/split_block_to_complex and
+    combine_single_from_complex/split_single_to_complex functions with a
+    hypercomplex 2D"""
+    data = hypercomplex_2d
 
     # Split to complex into a real/complex dataset
-    # [[ 0.+1.j,  2.+3.j,  4.+5.j],
-    #  [ 6.+7.j,  8.+9.j, 10.+11.j],
-    #  [12.+13.j, 14.+15.j, 16.+17.j],
-    #  [18.+19.j, 20.+21.j, 22.+23.j],
-    #  [24.+25.j, 26.+27.j, 28.+29.j],
-    #  [30.+31.j, 32.+33.j, 34.+35.j],
-    #  [36.+37.j, 38.+39.j, 40.+41.j],
-    #  [42.+43.j, 44.+45.j, 46.+47.j],
-    #  [48.+49.j, 50.+51.j, 52.+53.j],
-    #  [54.+55.j, 56.+57.j, 58.+59.j]]
-    cmplx = split_single_to_complex(data)
+    cmplx = split(data)
 
     # Check the size and the first and last row
     assert cmplx.size() == (M * 2, N)
-    assert tuple(cmplx[0]) == (0. + 1.j, 2. + 3.j, 4. + 5.j)
-    assert tuple(cmplx[-1]) == (54. + 55.j, 56. + 57.j, 58 + 59.j)
+    assert torch.equal(cmplx[[0, -1]], expected_rows)
 
     # Reorganize into a real/real tensor
+    combined = combine(cmplx)
+    assert torch.equal(combined, data)
+
+    # Higher dimension tensors are combined along the last dimension
+    combined = combine(cmplx.reshape(M, 2, N))
+    assert torch.equal(combined, data.reshape(M, 2, N * 2))
+
+
+@pytest.fixture(params=(torch.float32, torch.float64, torch.bfloat16),
+                ids=('float32', 'float64', 'bfloat16'))
+def dtype(request):
+    """The real data types for the test data"""
+    return request.param
+
+
+@pytest.fixture(params=('cpu', pytest.param(
+    'cuda', marks=pytest.mark.skipif(not torch.cuda.is_available(),
+                                     reason="CUDA is not available"))))
+def device(request):
+    """The devices for the test data"""
+    return request.param
+
+
+def test_split_combine_single_complex_views(hypercomplex_2d):
+    """Test that split_single_to_complex and combine_single_from_complex
+    return views of contiguous tensors without copying the data"""
+    data = hypercomplex_2d
+    cmplx = split_single_to_complex(data)
+    assert cmplx.data_ptr() == data.data_ptr()
+
     combined = combine_single_from_complex(cmplx)
-    assert torch.all(torch.eq(combined, data))
+    assert combined.data_ptr() == data.data_ptr()
+
+
+def test_split_single_to_soa(hypercomplex_2d):
+    """Test the split_single_to_soa function"""
+    data = hypercomplex_2d
+    real, imag = split_single_to_soa(data)
+
+    # Check the size and the components against the complex split
+    assert real.size() == imag.size() == (M * 2, N)
+    cmplx = split_single_to_complex(data)
+    assert torch.equal(real, cmplx.real)
+    assert torch.equal(imag, cmplx.imag)
+
+    # The components are views of the data
+    assert real.data_ptr() == data.data_ptr()
+    assert imag.data_ptr() == data.data_ptr() + data.element_size()
+
+
+def test_interleave_split_strided():
+    """Test the interleave and split functions with slices of a larger
+    tensor"""
+    big = torch.arange(float(M * 2 * N * 4)).reshape(M * 2, N * 4)
+
+    # Strided slices with real/imag pairs that are not aligned (odd offset),
+    # and that are aligned (even offset) to complex numbers
+    for offset in (1, 2):
+        data = big[:, offset:offset + N * 2]
+        assert not data.is_contiguous()
+
+        for func in (interleave_block_to_single, interleave_single_to_block,
+                     split_block_to_complex, split_single_to_complex):
+            assert torch.equal(func(data), func(data.contiguous()))
+
+    # Aligned pairs are viewed as complex numbers without a copy
+    assert split_single_to_complex(data).data_ptr() == data.data_ptr()
+
+    # Contiguous data with pairs that are not aligned are copied
+    data = big.flatten()[1:1 + M * 2 * N * 2].reshape(M * 2, N * 2)
+    assert data.is_contiguous()
+    assert torch.equal(split_single_to_complex(data),
+                       split_single_to_complex(data.clone()))
+
+
+@pytest.mark.parametrize('n, m', ((3, 5), (8, 5), (16, 16), (512, 4)))
+def test_interleave_split_sizes(n, m, dtype, device):
+    """Test the interleave, split and combine functions with sizes that are,
+    and are not, multiples of common vector widths"""
+    data = torch.arange(float(n * 2 * m * 2)).reshape(m * 2, n * 2)
+    data = data.to(dtype=dtype, device=device)
+
+    # Reference indices for the single-interleaved and block-interleaved data
+    points = torch.arange(n, device=device)
+    single_index = torch.stack((points, points + n), dim=-1).flatten()
+    block_index = torch.cat((points * 2, points * 2 + 1))
+
+    # Check the interleave functions against the indexed data
+    assert torch.equal(interleave_block_to_single(data), data[:, single_index])
+    assert torch.equal(interleave_single_to_block(data), data[:, block_index])
+    assert interleave_block_to_single(data).dtype == dtype
+
+    # Complex tensors are only available for single and double precision
+    if dtype is torch.bfloat16:
+        return
+    complex_dtype = (torch.complex64 if dtype is torch.float32 else
+                     torch.complex128)
+
+    # Check the split functions against the complex numbers built from the
+    # real and imag components, and check the combine functions
+    cmplx = split_block_to_complex(data)
+    assert cmplx.dtype == complex_dtype
+    assert torch.equal(cmplx, torch.complex(data[:, :n], data[:, n:]))
+    assert torch.equal(combine_block_from_complex(cmplx), data)
+
+    cmplx = split_single_to_complex(data)
+    assert torch.equal(cmplx, torch.complex(data[:, ::2], data[:, 1::2]))
+    assert torch.equal(combine_single_from_complex(cmplx), data)
+
+
+def test_interleave_roundtrip(dtype, device):
+    """Test that the interleave_block_to_single and interleave_single_to_block
+    functions are inverses"""
+    data = torch.arange(float(N * 2 * M * 2)).reshape(M * 2, N * 2)
+    data = data.to(dtype=dtype, device=device)
+
+    assert torch.equal(
+        interleave_single_to_block(interleave_block_to_single(data)), data)
+    assert torch.equal(
+        interleave_block_to_single(interleave_single_to_block(data)), data)
 
 
 @pytest.mark.parametrize('params', (